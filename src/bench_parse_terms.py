@@ -0,0 +1,141 @@
+import re
+import sys
+import math
+import time
+import random
+from typing import Callable, Dict, List, Tuple
+
+from src.parse_terms import (
+    BONUS_PATTERNS,
+    WAGERING_PATTERNS,
+    CAP_PATTERNS,
+    MONEY_HINT_PATTERN,
+    MGA_PATTERNS,
+    CURACAO_PATTERNS,
+    extract_first_bonus_percent,
+    extract_wagering_near,
+    find_max_withdrawal_cap,
+    extract_license,
+)
+
+# Skalnings-benchmark: extraktionstiden ska växa linjärt med textlängden.
+# Kör: python -m src.bench_parse_terms
+# Exit code 1 om något mönster/extractor växer klart snabbare än linjärt.
+
+SIZES = [10000, 20000, 40000, 80000]
+REPEATS = 3
+# log(t_max/t_min) / log(n_max/n_min). 1.0 = linjärt, 2.0 = kvadratiskt.
+MAX_GROWTH_EXPONENT = 1.4
+# Under denna tid (sekunder) på största storleken är mätbruset större än signalen
+MIN_MEASURABLE_S = 0.002
+# En enskild mätning över detta räknas som blowup direkt (så att benchmarken inte hänger)
+MAX_SINGLE_S = 2.0
+
+FUZZ_TOKENS = [
+    "bonus", "välkomstbonus", "100%", "35x", "omsättningskrav", "maxuttag",
+    "licensed", "malta", "curacao", "times", "gånger", "1.000", "kr", "€",
+    "1,5", "x", "%", "upp till", "få", "get", "rtp", "cashback", ".",
+]
+
+def _repeat_to(unit: str, n: int) -> str:
+    return (unit * (n // len(unit) + 1))[:n]
+
+def _fuzz(n: int, seed: int = 1234) -> str:
+    rnd = random.Random(seed)
+    parts: List[str] = []
+    size = 0
+    while size < n:
+        tok = rnd.choice(FUZZ_TOKENS)
+        parts.append(tok)
+        size += len(tok) + 1
+    return " ".join(parts)[:n]
+
+# Fientliga indata: långa serier som triggar backtracking i naiva mönster
+INPUTS: Dict[str, Callable[[int], str]] = {
+    "digits": lambda n: _repeat_to("1", n),
+    "digits_dots": lambda n: _repeat_to("1.", n),
+    "spaces_after_digit": lambda n: "1" + _repeat_to(" ", n - 1),
+    "licensed_no_malta": lambda n: _repeat_to("licensed ", n),
+    "regulated_no_malta": lambda n: _repeat_to("regulated ", n),
+    "bonus_words": lambda n: _repeat_to("bonus ", n),
+    "maxuttag_no_dot": lambda n: _repeat_to("maxuttag ", n),
+    "percent_bonus": lambda n: _repeat_to("100% bonus ", n),
+    "fuzz": _fuzz,
+}
+
+def _best_time(fn: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+        if best > MAX_SINGLE_S:
+            break
+    return best
+
+def _growth_exponent(times: List[float]) -> float:
+    if len(times) < 2 or times[-1] < MIN_MEASURABLE_S:
+        return 1.0
+    t0 = max(times[0], 1e-6)
+    return math.log(times[-1] / t0) / math.log(SIZES[len(times) - 1] / SIZES[0])
+
+def _targets() -> Dict[str, Callable[[str], object]]:
+    targets: Dict[str, Callable[[str], object]] = {}
+
+    named_patterns: List[Tuple[str, str]] = []
+    named_patterns += [(f"BONUS_PATTERNS[{i}]", p) for i, p in enumerate(BONUS_PATTERNS)]
+    named_patterns += [(f"WAGERING_PATTERNS[{i}]", p) for i, p in enumerate(WAGERING_PATTERNS)]
+    named_patterns += [(f"CAP_PATTERNS[{i}]", p) for i, p in enumerate(CAP_PATTERNS)]
+    named_patterns += [("MONEY_HINT_PATTERN", MONEY_HINT_PATTERN)]
+    named_patterns += [(f"MGA_PATTERNS[{i}]", p) for i, p in enumerate(MGA_PATTERNS)]
+    named_patterns += [(f"CURACAO_PATTERNS[{i}]", p) for i, p in enumerate(CURACAO_PATTERNS)]
+
+    for name, pat in named_patterns:
+        rx = re.compile(pat, flags=re.IGNORECASE)
+        # findall = värsta fallet (hela texten scannas)
+        targets[name] = lambda s, rx=rx: rx.findall(s)
+
+    # Extractorerna körs utan budget så att den verkliga kostnaden mäts
+    targets["extract_first_bonus_percent"] = lambda s: extract_first_bonus_percent(s)
+    targets["extract_wagering_near"] = lambda s: extract_wagering_near(s, 0)
+    targets["find_max_withdrawal_cap"] = lambda s: find_max_withdrawal_cap(s, None)
+    targets["extract_license"] = lambda s: extract_license(s)
+    return targets
+
+def run() -> List[Tuple[str, str, float, List[float]]]:
+    """
+    Returnerar (target, input, exponent, tider) för alla kombinationer som växer för snabbt.
+    """
+    flagged = []
+    targets = _targets()
+
+    for input_name, make in INPUTS.items():
+        texts = [make(n) for n in SIZES]
+        for target_name, fn in targets.items():
+            times: List[float] = []
+            for s in texts:
+                times.append(_best_time(lambda s=s: fn(s)))
+                if times[-1] > MAX_SINGLE_S:
+                    break
+            exp = _growth_exponent(times)
+            blowup = exp > MAX_GROWTH_EXPONENT or times[-1] > MAX_SINGLE_S
+            status = "BLOWUP" if blowup else "ok"
+            print(f"{status:6} {target_name:32} {input_name:20} exp={exp:5.2f} max={times[-1]*1000:8.2f} ms")
+            if blowup:
+                flagged.append((target_name, input_name, exp, times))
+
+    return flagged
+
+def main():
+    flagged = run()
+    print()
+    if flagged:
+        print(f"{len(flagged)} mönster/extractor växer snabbare än linjärt:")
+        for target_name, input_name, exp, _ in flagged:
+            print(f"  {target_name} på {input_name} (exp={exp:.2f})")
+        sys.exit(1)
+    print("OK: all extraktion skalar linjärt")
+
+
+if __name__ == "__main__":
+    main()
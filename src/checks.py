@@ -0,0 +1,297 @@
+import time
+import threading
+from datetime import datetime, timezone, timedelta
+
+import src.main as main_mod
+import src.sources as sources_mod
+from src.schedule import (
+    MAX_INTERVAL_HOURS,
+    MIN_INTERVAL_HOURS,
+    UNRELIABLE_MAX_INTERVAL_HOURS,
+    record_result,
+    select_due,
+)
+from src.parse_terms import (
+    ExtractionBudget,
+    SCAN_CHUNK_CHARS,
+    SCAN_CHUNK_OVERLAP,
+    WAGERING_PATTERNS,
+    CAP_PATTERNS,
+    _search_chunked,
+    extract_wagering_near,
+    extract_license,
+)
+
+# Beteendekontroller för budget-/schemaläggningsreglerna.
+# Kör: python -m src.checks  (ingen nätverks- eller Sheets-åtkomst behövs)
+
+GOOD_PAGE = "Välkomstbonus 100% bonus upp till 5000 kr. 35x omsättningskrav. Licensed by Malta Gaming Authority."
+FAR_FUTURE = time.thread_time() + 3600
+EXPIRED = ExtractionBudget(time_budget_s=-1.0)
+
+
+# -----------------------
+# user-026: BUDGET
+# -----------------------
+
+def check_cap_timeout_forces_osakra():
+    orig_fetch = main_mod.fetch_text_with_adapter
+    orig_cap = main_mod.find_max_withdrawal_cap
+    main_mod.fetch_text_with_adapter = lambda url, extract_cfg=None, cancel=None: (GOOD_PAGE, "OK: fullpage", url)
+    main_mod.find_max_withdrawal_cap = lambda text, anchor_pos, budget=None: (None, "Maxuttag/cap-sökning avbröts av tidsbudget", 0.5)
+    try:
+        row, fetched = main_mod.build_row_from_source({"name": "X", "url": "https://x.com/"}, "https://x.com/", None)
+    finally:
+        main_mod.fetch_text_with_adapter = orig_fetch
+        main_mod.find_max_withdrawal_cap = orig_cap
+    assert fetched
+    assert row["Confidence"] <= 0.5, row
+    assert row["_category"] == "osakra", row
+
+def check_timeouts_report_less_than_not_found():
+    filler = "y " * SCAN_CHUNK_CHARS
+    _, _, clean_conf = extract_wagering_near(filler, 0)
+    _, _, timed_conf = extract_wagering_near(filler, 0, budget=EXPIRED)
+    assert timed_conf < clean_conf, (timed_conf, clean_conf)
+
+    lic, lic_conf, note = extract_license(filler, budget=EXPIRED)
+    assert lic == "OKAND" and lic_conf < 0.3, (lic, lic_conf)
+    assert "MGA" in note and "ej kontrollerad" in note, note
+
+def check_chunk_boundary_rematch():
+    end = SCAN_CHUNK_CHARS + SCAN_CHUNK_OVERLAP
+    # "5 times" slutar exakt vid chunk-gränsen men ordet fortsätter ("timestamp")
+    s = ("a " * end)[:end - len("5 times")] + "5 timestamp " + "b " * SCAN_CHUNK_CHARS + "7 times."
+    m, timed_out = _search_chunked(WAGERING_PATTERNS[2], s, FAR_FUTURE)
+    assert not timed_out and m and m.group(1) == "7", m
+
+    # Cap-snippet som börjar precis före gränsen ska inte kapas
+    s = "a" * (end - 20) + "maxuttag " + "z" * 131 + ". rest " + "c" * SCAN_CHUNK_CHARS
+    m, _ = _search_chunked(CAP_PATTERNS[0], s, FAR_FUTURE)
+    assert m and len(m.group(0)) == len("maxuttag ") + 131, m
+
+
+class _FakeStreamResponse:
+    encoding = "utf-8"
+
+    def __init__(self, total_bytes):
+        self.total_bytes = total_bytes
+        self.read_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        while self.read_bytes < self.total_bytes:
+            self.read_bytes += chunk_size
+            yield b"a" * chunk_size
+
+def check_response_is_capped_before_parsing():
+    resp = _FakeStreamResponse(total_bytes=50_000_000)
+    orig = sources_mod.requests.get
+    sources_mod.requests.get = lambda *a, **kw: resp
+    try:
+        html, note = sources_mod._get_capped("https://x.com/", 25, 1_000_000)
+    finally:
+        sources_mod.requests.get = orig
+    assert len(html) == 1_000_000 and resp.read_bytes < 1_100_000, (len(html), resp.read_bytes)
+    assert "kapat" in note, note
+
+# -----------------------
+# user-027: SCHEDULE
+# -----------------------
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def _row(bonus):
+    return {"BonusProcent": bonus, "OmsattningsKrav": 35.0, "MaxUttagBonusvinster": "", "_tab": "MGA_bonus_over_50"}
+
+def check_stable_interval_grows_to_cap():
+    state = {"casinos": {}}
+    now = T0
+    entry = None
+    for _ in range(60):
+        entry = record_result(state, "stable.com", _row(100), True, now=now)
+        now = datetime.fromisoformat(entry["next_due"])
+    assert entry["changed_runs"] == 0
+    assert entry["interval_hours"] == MAX_INTERVAL_HOURS, entry["interval_hours"]
+
+def check_timed_out_runs_are_not_changes():
+    state = {"casinos": {}}
+    for i in range(10):
+        reliable = i % 2 == 0
+        record_result(state, "flaky.com", _row(100 if reliable else ""), True, reliable=reliable, timed_out=not reliable, now=T0 + timedelta(days=i))
+    entry = state["casinos"]["flaky.com"]
+    assert entry["changed_runs"] == 0 and entry["checks"] == 10, entry
+
+def check_unreliable_runs_do_not_prove_stability():
+    state = {"casinos": {}}
+    now = T0
+    for _ in range(60):
+        entry = record_result(state, "osakra.com", _row(""), True, reliable=False, now=now)
+        now = datetime.fromisoformat(entry["next_due"])
+    assert entry["interval_hours"] <= UNRELIABLE_MAX_INTERVAL_HOURS, entry["interval_hours"]
+
+def check_bonus_withdrawn_counts_as_change():
+    state = {"casinos": {}}
+    record_result(state, "x.com", _row(100), True, now=T0)
+    for i in range(1, 4):
+        record_result(state, "x.com", _row(""), True, reliable=False, now=T0 + timedelta(days=i))
+    entry = state["casinos"]["x.com"]
+    assert entry["changed_runs"] == 1 and entry["field_changes"]["BonusProcent"] == 1, entry
+
+def check_failed_fetch_keeps_last_row():
+    state = {"casinos": {}}
+    record_result(state, "x.com", _row(100), True, now=T0)
+    entry = record_result(state, "x.com", {"_tab": "OKAND_osakra", "ParsingNote": "Kunde inte hämta sida."}, False, now=T0 + timedelta(days=1))
+    assert entry["last_row"]["BonusProcent"] == 100, entry["last_row"]
+    assert entry["interval_hours"] == MIN_INTERVAL_HOURS, entry
+
+def check_select_due_budget_and_order():
+    state = {"casinos": {}}
+    for key, due_h in (("a.com", -1), ("b.com", -48), ("c.com", -24), ("d.com", 5)):
+        entry = record_result(state, key, _row(100), True, now=T0)
+        entry["next_due"] = (T0 + timedelta(hours=due_h)).isoformat()
+    casinos = [(k, {"sources": [k] * n}) for k, n in (("a.com", 1), ("b.com", 1), ("c.com", 2), ("d.com", 1))]
+
+    picked = [k for k, _ in select_due(state, casinos, 2, now=T0)]
+    assert picked == ["b.com", "c.com"], picked
+
+    # Kostnad = antal källor: c.com (2) ryms inte efter b.com (1) i budget 2
+    picked = [k for k, _ in select_due(state, casinos, 2, cost=lambda c: len(c["sources"]), now=T0)]
+    assert picked == ["b.com"], picked
+
+    # Ej due (d.com) tas aldrig med
+    picked = [k for k, _ in select_due(state, casinos, 100, now=T0)]
+    assert picked == ["b.com", "c.com", "a.com"], picked
+
+def check_bootstrap_ignores_budget():
+    casinos = [(f"c{i}.com", {}) for i in range(55)]
+    picked = select_due({"casinos": {}}, casinos, 15, now=T0)
+    assert len(picked) == 55, len(picked)
+
+
+# -----------------------
+# user-028: MULTI-SOURCE
+# -----------------------
+
+PAGES = {
+    "https://x.com/a": GOOD_PAGE,
+    "https://x.com/b": GOOD_PAGE.replace("100%", "200%"),
+    "https://x.com/slow": GOOD_PAGE.replace("100%", "300%"),
+}
+
+def _fake_fetch(url, extract_cfg=None, cancel=None):
+    if url.endswith("/slow"):
+        time.sleep(2)
+    if url not in PAGES:
+        return None, "Fetch-fel: stub", url
+    return PAGES[url], "OK: fullpage", url
+
+def _build(casino, pool=None):
+    orig = main_mod.fetch_text_with_adapter
+    main_mod.fetch_text_with_adapter = _fake_fetch
+    try:
+        return main_mod.build_row(casino, pool)
+    finally:
+        main_mod.fetch_text_with_adapter = orig
+
+def check_multi_source_early_winner():
+    pool = main_mod.SourcePool()
+    try:
+        t0 = time.monotonic()
+        row, fetched = _build({"name": "X", "url": "https://x.com/", "sources": ["https://x.com/slow", "https://x.com/missing", "https://x.com/b"]}, pool)
+        assert time.monotonic() - t0 < 1.0, "väntade på långsam källa"
+        assert fetched and row["BonusProcent"] == 200 and "Källa 3/3 (tidig vinnare)" in row["ParsingNote"], row
+        assert len(pool.stragglers) == 1, pool.stragglers
+
+        # Två godkända källor: lägst index vinner, både parallellt och seriellt
+        for p in (pool, None):
+            row, _ = _build({"name": "X", "url": "https://x.com/", "sources": ["https://x.com/a", "https://x.com/b"]}, p)
+            assert row["_source"] == "https://x.com/a", row
+    finally:
+        pool.shutdown()
+
+def check_cancel_stops_download():
+    resp = _FakeStreamResponse(total_bytes=50_000_000)
+    cancel = threading.Event()
+    cancel.set()
+    orig = sources_mod.requests.get
+    sources_mod.requests.get = lambda *a, **kw: resp
+    try:
+        text, note, _ = sources_mod.fetch_text_with_adapter("https://x.com/", cancel=cancel)
+    finally:
+        sources_mod.requests.get = orig
+    assert text is None and "avbruten" in note and resp.read_bytes <= 65536, (note, resp.read_bytes)
+
+def check_pool_reserves_capacity_per_casino():
+    pool = main_mod.SourcePool(workers=1)
+    try:
+        pool.stragglers = [pool.executor.submit(time.sleep, d) for d in (0.2, 0.5)]
+        t0 = time.monotonic()
+        pool.reserve()
+        waited = time.monotonic() - t0
+        assert len(pool.stragglers) <= 1 and 0.1 < waited < 0.45, (pool.stragglers, waited)
+    finally:
+        pool.shutdown()
+
+def check_invalid_sources_are_skipped():
+    sources = [["nested"], 42, {"url": 7}, {"url": "https://x.com/b", "extract": "selectors"}, "https://x.com/a"]
+    row, fetched = _build({"name": "X", "url": "https://x.com/", "sources": sources})
+    assert fetched and row["_source"] == "https://x.com/a", row
+    assert row["ParsingNote"].count("ignorerad") == 4, row["ParsingNote"]
+
+    row, fetched = _build({"name": "X", "url": "https://x.com/a", "extract": "selectors"})
+    assert fetched and "extract är inte ett objekt" in row["ParsingNote"], row
+
+def check_source_switch_is_not_a_change():
+    state = {"casinos": {}}
+    for i, (src, bonus) in enumerate((("a", 100), ("b", 200), ("a", 100), ("a", 100))):
+        row = dict(_row(bonus), _source=src)
+        record_result(state, "x.com", row, True, now=T0 + timedelta(days=i))
+    assert state["casinos"]["x.com"]["changed_runs"] == 0, state["casinos"]["x.com"]
+
+def check_alternating_sources_still_count_changes():
+    state = {"casinos": {}}
+    runs = (("a", 100), ("b", 200), ("a", 150), ("b", 250), ("a", 175))
+    for i, (src, bonus) in enumerate(runs):
+        record_result(state, "x.com", dict(_row(bonus), _source=src), True, now=T0 + timedelta(days=i))
+    # a: 100->150->175 (2), b: 200->250 (1)
+    assert state["casinos"]["x.com"]["changed_runs"] == 3, state["casinos"]["x.com"]
+
+
+CHECKS = [
+    check_cap_timeout_forces_osakra,
+    check_timeouts_report_less_than_not_found,
+    check_chunk_boundary_rematch,
+    check_response_is_capped_before_parsing,
+    check_stable_interval_grows_to_cap,
+    check_timed_out_runs_are_not_changes,
+    check_unreliable_runs_do_not_prove_stability,
+    check_bonus_withdrawn_counts_as_change,
+    check_failed_fetch_keeps_last_row,
+    check_select_due_budget_and_order,
+    check_bootstrap_ignores_budget,
+    check_multi_source_early_winner,
+    check_pool_reserves_capacity_per_casino,
+    check_cancel_stops_download,
+    check_invalid_sources_are_skipped,
+    check_source_switch_is_not_a_change,
+    check_alternating_sources_still_count_changes,
+]
+
+def main():
+    for check in CHECKS:
+        check()
+        print(f"ok     {check.__name__}")
+    print("OK: alla kontroller passerade")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import os
 import json
-from typing import Dict, Any, List, Tuple
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from src.sources import fetch_text_with_adapter
@@ -9,6 +11,16 @@ from src.parse_terms import (
     extract_wagering_near,
     find_max_withdrawal_cap,
     extract_license,
+    clip_text,
+    ExtractionBudget,
+)
+from src.schedule import (
+    load_state,
+    save_state,
+    select_due,
+    record_result,
+    cached_row,
+    DEFAULT_STATE_PATH,
 )
 from src.sheets import (
     open_sheet,
@@ -20,6 +32,18 @@ from src.sheets import (
     LICENSES,
 )
 
+# Kostnadstak per sida: max textlängd + tidsbudget per extractor
+EXTRACTION_BUDGET = ExtractionBudget()
+
+# Max antal sidhämtningar (källor, se casino_sources) per körning i SCHEDULE_MODE=adaptive
+DEFAULT_FETCH_BUDGET = 15
+
+# Under denna confidence hamnar en rad i osakra; en källa som når den vinner direkt
+CONFIDENCE_THRESHOLD = 0.7
+
+# Max antal källor per casino som hämtas samtidigt
+MAX_SOURCE_WORKERS = 4
+
 # -----------------------
 # DEDUPE + NORMALIZATION
 # -----------------------
@@ -88,7 +112,7 @@ def classify_category(row: Dict[str, Any]) -> str:
         return "osakra"
 
     # Låg confidence => osäkra
-    if conf < 0.7:
+    if conf < CONFIDENCE_THRESHOLD:
         return "osakra"
 
     return "bonus_over_50" if float(bonus) > 50 else "bonus_50_eller_mindre"
@@ -158,100 +182,279 @@ def load_casinos(path: str) -> List[Dict[str, Any]]:
 # MAIN
 # -----------------------
 
+def casino_sources(c: Dict[str, Any]) -> Tuple[List[Tuple[str, Optional[Dict[str, Any]]]], List[str]]:
+    """
+    Kandidatkällor för ett casino som (url, extract_cfg), i prioritetsordning.
+    "sources" kan innehålla url-strängar eller {"url": ..., "extract": {...}};
+    källor utan egen "extract" använder casinots. Saknas "sources" => bonus_url/url.
+    Returnerar (sources, varningar); ogiltiga poster hoppas över med en varning.
+    """
+    url = (c.get("url") or "").strip()
+    extract_cfg = c.get("extract")
+
+    out = []
+    warnings = []
+    if extract_cfg is not None and not isinstance(extract_cfg, dict):
+        warnings.append("VARNING: extract är inte ett objekt, ignorerad (fullpage)")
+        extract_cfg = None
+
+    raw = c.get("sources") or []
+    if isinstance(raw, str):
+        raw = [raw]
+
+    if not isinstance(raw, list):
+        warnings.append("VARNING: sources är inte en lista, ignorerad")
+        raw = []
+
+    for i, src in enumerate(raw, start=1):
+        if isinstance(src, str):
+            src = {"url": src}
+        src_url = src.get("url") if isinstance(src, dict) else None
+        if not isinstance(src_url, str) or not src_url.strip():
+            warnings.append(f"VARNING: sources[{i}] är ogiltig, ignorerad")
+            continue
+        src_extract = src.get("extract", extract_cfg)
+        if src_extract is not None and not isinstance(src_extract, dict):
+            warnings.append(f"VARNING: sources[{i}].extract är inte ett objekt, källan ignorerad")
+            continue
+        out.append((src_url.strip(), src_extract))
+
+    if not out:
+        bonus_url = (c.get("bonus_url") or "").strip() or url
+        out.append((bonus_url, extract_cfg))
+    return out, warnings
+
+
+def build_row_from_source(c: Dict[str, Any], bonus_url: str, extract_cfg: Optional[Dict[str, Any]], cancel: Optional[threading.Event] = None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Hämtar + extraherar en källa för ett casino.
+    Returnerar (row, fetched) där row innehåller interna fälten _category/_tab
+    och fetched är False om sidan inte kunde hämtas.
+    """
+    name = (c.get("name") or "").strip()
+    url = (c.get("url") or "").strip()
+
+    base_row: Dict[str, Any] = {
+        "Casino": name or url,
+        "URL": url,
+        "Kalla": bonus_url,
+    }
+
+    text, fetch_note, final_url = fetch_text_with_adapter(bonus_url, extract_cfg=extract_cfg, cancel=cancel)
+    base_row["Kalla"] = final_url
+
+    if not text:
+        row = dict(base_row)
+        row.update({
+            "Licens": "OKAND",
+            "LicenseConfidence": 0.1,
+            "BonusProcent": "",
+            "OmsattningsKrav": "",
+            "MaxUttagBonusvinster": "",
+            "Confidence": 0.1,
+            "ParsingNote": f"Kunde inte hämta sida. {fetch_note}",
+            "Score": "",
+        })
+        row["_category"] = "osakra"
+        row["_tab"] = "OKAND_osakra"
+    else:
+        text, clip_note = clip_text(text, EXTRACTION_BUDGET)
+
+        lic, lic_conf, lic_note = extract_license(text, budget=EXTRACTION_BUDGET)
+
+        bonus_percent, anchor_pos, bonus_note, bonus_conf = extract_first_bonus_percent(text, budget=EXTRACTION_BUDGET)
+        wagering_x, wag_note, wag_conf = extract_wagering_near(text, anchor_pos if anchor_pos is not None else 0, budget=EXTRACTION_BUDGET)
+        cap_text, cap_note, cap_conf = find_max_withdrawal_cap(text, anchor_pos, budget=EXTRACTION_BUDGET)
+
+        conf = min(bonus_conf, wag_conf)
+        # Även en avbruten cap-sökning (ingen cap, låg confidence) sänker raden:
+        # ett obekräftat "inget maxuttag" får inte hamna i bonusflikarna
+        if cap_text or cap_conf < CONFIDENCE_THRESHOLD:
+            conf = min(conf, cap_conf)
+
+        row = dict(base_row)
+        row["Licens"] = lic
+        row["LicenseConfidence"] = round(float(lic_conf), 2)
+        row["BonusProcent"] = bonus_percent if bonus_percent is not None else ""
+        row["OmsattningsKrav"] = wagering_x if wagering_x is not None else ""
+        row["MaxUttagBonusvinster"] = cap_text if cap_text else ""
+        row["Confidence"] = round(float(conf), 2)
+
+        parsing_notes = [fetch_note, clip_note, lic_note, bonus_note, wag_note, cap_note]
+        row["ParsingNote"] = " | ".join([n for n in parsing_notes if n])
+
+        if bonus_percent is not None and wagering_x is not None and not cap_text:
+            row["Score"] = round(compute_score(bonus_percent, wagering_x), 4)
+        else:
+            row["Score"] = ""
+
+        category = classify_category(row)
+        lic_final = row.get("Licens") or "OKAND"
+        tab = f"{lic_final}_{category}"
+
+        row["_category"] = category
+        row["_tab"] = tab
+
+    return row, bool(text)
+
+
+class SourcePool:
+    """
+    Delad trådpool för källhämtningar (MAX_SOURCE_WORKERS * 2 trådar).
+    Källor som förlorat mot en tidig vinnare signaleras via cancel och läggs som
+    stragglers; nästa casino väntar tills högst MAX_SOURCE_WORKERS stragglers
+    återstår, så att varje casino alltid har MAX_SOURCE_WORKERS lediga trådar.
+    """
+
+    def __init__(self, workers: int = MAX_SOURCE_WORKERS):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers * 2)
+        self.stragglers: List[Future] = []
+
+    def reserve(self) -> None:
+        self.stragglers = [f for f in self.stragglers if not f.done()]
+        while len(self.stragglers) > self.workers:
+            wait(self.stragglers, return_when=FIRST_COMPLETED)
+            self.stragglers = [f for f in self.stragglers if not f.done()]
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _passes(row: Dict[str, Any], fetched: bool) -> bool:
+    return fetched and float(row.get("Confidence") or 0) >= CONFIDENCE_THRESHOLD
+
+
+def build_row(c: Dict[str, Any], pool: Optional[SourcePool] = None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Hämtar kandidatkällorna för ett casino, parallellt om pool ges.
+    Så fort en källa når CONFIDENCE_THRESHOLD väntas resten inte in; bland de
+    källor som då är klara och godkända vinner den med lägst index, så att
+    valet inte avgörs av nätverkstiming i onödan. Annars väljs bästa hämtade
+    källan via choose_winner.
+    """
+    sources, warnings = casino_sources(c)
+    if len(sources) == 1 and not warnings:
+        return build_row_from_source(c, *sources[0])
+
+    results: Dict[int, Tuple[Dict[str, Any], bool]] = {}
+    if pool is None or len(sources) == 1:
+        for i, (src_url, extract_cfg) in enumerate(sources, start=1):
+            results[i] = build_row_from_source(c, src_url, extract_cfg)
+            if _passes(*results[i]):
+                break
+    else:
+        pool.reserve()
+        cancel = threading.Event()
+        futures = {
+            pool.executor.submit(build_row_from_source, c, src_url, extract_cfg, cancel): i
+            for i, (src_url, extract_cfg) in enumerate(sources, start=1)
+        }
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+            if _passes(*results[futures[fut]]):
+                break
+        # Ta med källor som hunnit bli klara; resten avbryts (ej startade direkt,
+        # pågående vid nästa nedladdningsbit) och räknas som stragglers
+        cancel.set()
+        for fut, i in futures.items():
+            if i in results:
+                continue
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                results[i] = fut.result()
+            elif not fut.cancel():
+                pool.stragglers.append(fut)
+
+    passed = sorted(i for i, (row, fetched) in results.items() if _passes(row, fetched))
+    fetched_idx = sorted(i for i, (_, fetched) in results.items() if fetched)
+
+    if passed:
+        best_idx = passed[0]
+    elif fetched_idx:
+        best_idx = fetched_idx[0]
+        for i in fetched_idx[1:]:
+            if choose_winner(results[best_idx][0], results[i][0]) is results[i][0]:
+                best_idx = i
+    else:
+        best_idx = min(results)
+
+    best, fetched = results[best_idx]
+    best["_source"] = sources[best_idx - 1][0]
+
+    notes = [best.get("ParsingNote")] + warnings
+    if len(sources) > 1:
+        early = bool(passed) and len(results) < len(sources)
+        notes.append(f"Källa {best_idx}/{len(sources)}" + (" (tidig vinnare)" if early else ""))
+    best["ParsingNote"] = " | ".join([n for n in notes if n])
+    return best, fetched
+
+
 def main():
     sheet_id = os.environ.get("SHEET_ID", "").strip()
     sa_json = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON", "")
     sa_json_b64 = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON_B64", "")
+    schedule_mode = os.environ.get("SCHEDULE_MODE", "full").strip().lower()
+    state_path = os.environ.get("REFRESH_STATE_PATH", "").strip() or DEFAULT_STATE_PATH
 
     if not sheet_id:
         raise ValueError("SHEET_ID saknas. Sätt GitHub Secret SHEET_ID.")
+    if schedule_mode not in ("full", "adaptive"):
+        raise ValueError(f"Okänt SCHEDULE_MODE: {schedule_mode} (full|adaptive)")
 
     casinos = dedupe_casino_list(load_casinos("casinos.json"))
 
-    sh = open_sheet(sheet_id, service_account_json=sa_json, service_account_json_b64=sa_json_b64)
-    ensure_tabs_and_headers(sh)
-
-    # Rensa alla tabs (behåll headers)
-    for tab in TABS:
-        clear_tab(sh, tab)
-
-    # Global dedupe över ALLA tabs: 1 casino -> 1 final flik
-    # key = domän -> row (inkl. vilken tab den ska till)
-    winners_by_domain: Dict[str, Dict[str, Any]] = {}
-
+    keyed: List[Tuple[str, Dict[str, Any]]] = []
     for c in casinos:
-        name = (c.get("name") or "").strip()
         url = (c.get("url") or "").strip()
-        bonus_url = (c.get("bonus_url") or "").strip() or url
-        extract_cfg = c.get("extract")
-
         domain_key = normalize_domain(url) or url.lower()
         if not domain_key:
             # hoppa över helt trasiga entries
             continue
+        keyed.append((domain_key, c))
 
-        base_row: Dict[str, Any] = {
-            "Casino": name or url,
-            "URL": url,
-            "Kalla": bonus_url,
-        }
-
-        text, fetch_note, final_url = fetch_text_with_adapter(bonus_url, extract_cfg=extract_cfg)
-        base_row["Kalla"] = final_url
-
-        if not text:
-            row = dict(base_row)
-            row.update({
-                "Licens": "OKAND",
-                "LicenseConfidence": 0.1,
-                "BonusProcent": "",
-                "OmsattningsKrav": "",
-                "MaxUttagBonusvinster": "",
-                "Confidence": 0.1,
-                "ParsingNote": f"Kunde inte hämta sida. {fetch_note}",
-                "Score": "",
-            })
-            row["_category"] = "osakra"
-            row["_tab"] = "OKAND_osakra"
-        else:
-            lic, lic_conf, lic_note = extract_license(text)
+    state = load_state(state_path)
+    # Casinon som tagits bort ur casinos.json ska inte ligga kvar i state
+    active = {k for k, _ in keyed}
+    state["casinos"] = {k: v for k, v in state["casinos"].items() if k in active}
 
-            bonus_percent, anchor_pos, bonus_note, bonus_conf = extract_first_bonus_percent(text)
-            wagering_x, wag_note, wag_conf = extract_wagering_near(text, anchor_pos if anchor_pos is not None else 0)
-            cap_text, cap_note, cap_conf = find_max_withdrawal_cap(text, anchor_pos)
+    if schedule_mode == "adaptive":
+        fetch_budget = int(os.environ.get("FETCH_BUDGET", "") or DEFAULT_FETCH_BUDGET)
+        due_keys = {k for k, _ in select_due(state, keyed, fetch_budget, cost=lambda c: len(casino_sources(c)[0]))}
+    else:
+        due_keys = active
 
-            conf = min(bonus_conf, wag_conf)
-            if cap_text:
-                conf = min(conf, cap_conf)
+    sh = open_sheet(sheet_id, service_account_json=sa_json, service_account_json_b64=sa_json_b64)
+    ensure_tabs_and_headers(sh)
 
-            row = dict(base_row)
-            row["Licens"] = lic
-            row["LicenseConfidence"] = round(float(lic_conf), 2)
-            row["BonusProcent"] = bonus_percent if bonus_percent is not None else ""
-            row["OmsattningsKrav"] = wagering_x if wagering_x is not None else ""
-            row["MaxUttagBonusvinster"] = cap_text if cap_text else ""
-            row["Confidence"] = round(float(conf), 2)
+    # Rensa alla tabs (behåll headers)
+    for tab in TABS:
+        clear_tab(sh, tab)
 
-            parsing_notes = [fetch_note, lic_note, bonus_note, wag_note, cap_note]
-            row["ParsingNote"] = " | ".join([n for n in parsing_notes if n])
+    # Global dedupe över ALLA tabs: 1 casino -> 1 final flik
+    # key = domän -> row (inkl. vilken tab den ska till)
+    winners_by_domain: Dict[str, Dict[str, Any]] = {}
 
-            if bonus_percent is not None and wagering_x is not None and not cap_text:
-                row["Score"] = round(compute_score(bonus_percent, wagering_x), 4)
+    # Delad pool för källhämtningar, se SourcePool
+    pool = SourcePool()
+    try:
+        for domain_key, c in keyed:
+            row = None if domain_key in due_keys else cached_row(state, domain_key)
+            if row is None:
+                row, fetched = build_row(c, pool)
+                # Rader under tröskeln jämförs inte fullt ut; tidsbudget-avbrott räknas aldrig som ändring
+                reliable = float(row.get("Confidence") or 0) >= CONFIDENCE_THRESHOLD
+                timed_out = "tidsbudget" in (row.get("ParsingNote") or "")
+                record_result(state, domain_key, row, fetched, reliable=reliable, timed_out=timed_out)
+
+            # GLOBAL DEDUPE: välj vinnaren för domänen
+            if domain_key not in winners_by_domain:
+                winners_by_domain[domain_key] = row
             else:
-                row["Score"] = ""
-
-            category = classify_category(row)
-            lic_final = row.get("Licens") or "OKAND"
-            tab = f"{lic_final}_{category}"
+                winners_by_domain[domain_key] = choose_winner(winners_by_domain[domain_key], row)
+    finally:
+        pool.shutdown()
 
-            row["_category"] = category
-            row["_tab"] = tab
-
-        # GLOBAL DEDUPE: välj vinnaren för domänen
-        if domain_key not in winners_by_domain:
-            winners_by_domain[domain_key] = row
-        else:
-            winners_by_domain[domain_key] = choose_winner(winners_by_domain[domain_key], row)
+    save_state(state, state_path)
 
     # Bygg buckets från winners
     buckets: Dict[str, List[Dict[str, Any]]] = {t: [] for t in TABS}
@@ -264,6 +467,7 @@ def main():
         # ta bort interna fält
         row.pop("_tab", None)
         row.pop("_category", None)
+        row.pop("_source", None)
         buckets[tab].append(row)
 
     # Skriv till sheets
@@ -1,4 +1,5 @@
 import re
+import time
 from dataclasses import dataclass
 from typing import Optional, List, Tuple
 
@@ -12,6 +13,76 @@ NON_BONUS_CONTEXT_RED_FLAGS = [
     "rtp", "återbetalning", "payback", "cashback", "rabatt", "apr", "ränta",
 ]
 
+# -----------------------
+# BUDGET (bounded-cost extraction)
+# -----------------------
+
+# Confidence-tak när en extractor avbryts av tidsbudgeten (< 0.7 => hamnar i osakra)
+BUDGET_EXCEEDED_CONF = 0.5
+# Avbruten sökning utan träff: lägre än motsvarande "hittades inte" efter full sökning
+BUDGET_EXCEEDED_NOT_FOUND_CONF = 0.2
+
+# Globala fallback-scanningar görs i bitar så att tidsbudgeten kan kontrolleras mellan dem
+SCAN_CHUNK_CHARS = 20000
+SCAN_CHUNK_OVERLAP = 400
+
+@dataclass
+class ExtractionBudget:
+    """
+    Kostnadstak för extraktion på en sida.
+    max_chars: max antal tecken text som skickas till extractorerna
+    time_budget_s: tidsbudget per extractor (sekunder CPU-tid i anropande tråd,
+                   så att andra trådars last inte räknas mot budgeten)
+    """
+    max_chars: int = 200000
+    time_budget_s: float = 0.5
+
+    def deadline(self) -> float:
+        return time.thread_time() + self.time_budget_s
+
+def _expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.thread_time() > deadline
+
+def clip_text(text: str, budget: Optional[ExtractionBudget] = None) -> Tuple[str, str]:
+    """
+    Kapar sidtexten till budgetens max_chars.
+    Returnerar (text, note) där note är tom om inget kapades.
+    """
+    if budget is None or len(text) <= budget.max_chars:
+        return text, ""
+    return text[:budget.max_chars], f"Text kapad till {budget.max_chars} av {len(text)} tecken"
+
+def _search_chunked(pattern: str, s: str, deadline: Optional[float]) -> Tuple[Optional["re.Match"], bool]:
+    """
+    re.search i överlappande bitar. Returnerar (match, timed_out).
+    Överlappet täcker alla mönster (de är begränsade till < SCAN_CHUNK_OVERLAP tecken).
+    """
+    if deadline is None or len(s) <= SCAN_CHUNK_CHARS:
+        return re.search(pattern, s, flags=re.IGNORECASE), False
+
+    rx = re.compile(pattern, flags=re.IGNORECASE)
+    pos = 0
+    while pos < len(s):
+        if _expired(deadline):
+            return None, True
+        end = min(len(s), pos + SCAN_CHUNK_CHARS + SCAN_CHUNK_OVERLAP)
+        start = pos
+        while True:
+            m = rx.search(s, start, end)
+            if not m or m.end() < end or end == len(s):
+                break
+            # Träffen slutar exakt vid chunk-gränsen: endpos räknas som strängslut, så \b kan
+            # matcha mitt i ett ord och [^.]{0,140} kapas. Matcha om utan gräns.
+            full = rx.match(s, m.start())
+            if full:
+                m = full
+                break
+            start = m.start() + 1
+        if m:
+            return m, False
+        pos += SCAN_CHUNK_CHARS
+    return None, False
+
 @dataclass
 class BonusHit:
     percent: int
@@ -33,12 +104,19 @@ BONUS_PATTERNS = [
     r'(?:få|get)\s+(\d{1,3})\s*%\s*(?:upp till|bonus|welcome|deposit)',
 ]
 
-def extract_first_bonus_percent(text: str) -> Tuple[Optional[int], Optional[int], str, float]:
+def extract_first_bonus_percent(text: str, budget: Optional[ExtractionBudget] = None) -> Tuple[Optional[int], Optional[int], str, float]:
     t = text.lower()
     hits: List[BonusHit] = []
+    deadline = budget.deadline() if budget else None
+    timed_out = False
 
     for pat in BONUS_PATTERNS:
+        if timed_out:
+            break
         for m in re.finditer(pat, t, flags=re.IGNORECASE):
+            if _expired(deadline):
+                timed_out = True
+                break
             try:
                 val = int(m.group(1))
             except Exception:
@@ -52,6 +130,8 @@ def extract_first_bonus_percent(text: str) -> Tuple[Optional[int], Optional[int]
                 hits.append(BonusHit(percent=val, start=start, context=context))
 
     if not hits:
+        if timed_out:
+            return None, None, "Ingen casino-bonusprocent hittades inom tidsbudget", 0.2
         return None, None, "Ingen casino-bonusprocent hittades (eller ej tydligt casino-bonus)", 0.2
 
     hits.sort(key=lambda h: h.start)
@@ -62,20 +142,25 @@ def extract_first_bonus_percent(text: str) -> Tuple[Optional[int], Optional[int]
     if len(hits) > 1:
         note += f" | {len(hits)} bonus-träffar hittades, valde tidigaste"
         conf = 0.80
+    if timed_out:
+        note += " | tidsbudget överskreds, alla träffar ej kontrollerade"
+        conf = min(conf, BUDGET_EXCEEDED_CONF)
 
     return first.percent, first.start, note, conf
 
-def extract_wagering_near(text: str, anchor_pos: int, window: int = 2800) -> Tuple[Optional[float], str, float]:
+# Kvantifierarna är begränsade så att långa siffer-/whitespace-serier inte ger kvadratisk backtracking
+WAGERING_PATTERNS = [
+    r'(\d{1,6}(?:[.,]\d{1,3})?)\s{0,3}x',
+    r'omsättningskrav[^0-9]{0,40}(\d{1,6}(?:[.,]\d{1,3})?)',
+    r'(\d{1,6}(?:[.,]\d{1,3})?)\s{0,3}(?:gånger|times)\b'
+]
+
+def extract_wagering_near(text: str, anchor_pos: int, window: int = 2800, budget: Optional[ExtractionBudget] = None) -> Tuple[Optional[float], str, float]:
     t = text.lower()
     segment = t[anchor_pos:anchor_pos + window] if anchor_pos is not None else t[:window]
+    deadline = budget.deadline() if budget else None
 
-    patterns = [
-        r'(\d+(?:[.,]\d+)?)\s*x',
-        r'omsättningskrav[^0-9]{0,40}(\d+(?:[.,]\d+)?)',
-        r'(\d+(?:[.,]\d+)?)\s*(?:gånger|times)\b'
-    ]
-
-    for p in patterns:
+    for p in WAGERING_PATTERNS:
         m = re.search(p, segment, flags=re.IGNORECASE)
         if m:
             raw = m.group(1).replace(",", ".")
@@ -87,8 +172,10 @@ def extract_wagering_near(text: str, anchor_pos: int, window: int = 2800) -> Tup
                 pass
 
     # fallback globalt med lägre confidence
-    for p in patterns:
-        m = re.search(p, t, flags=re.IGNORECASE)
+    for p in WAGERING_PATTERNS:
+        m, timed_out = _search_chunked(p, t, deadline)
+        if timed_out:
+            return None, "Omsättningskrav hittades inte inom tidsbudget", BUDGET_EXCEEDED_NOT_FOUND_CONF
         if m:
             raw = m.group(1).replace(",", ".")
             try:
@@ -100,64 +187,90 @@ def extract_wagering_near(text: str, anchor_pos: int, window: int = 2800) -> Tup
 
     return None, "Omsättningskrav hittades inte", 0.3
 
-def find_max_withdrawal_cap(text: str, anchor_pos: Optional[int], window: int = 3500) -> Tuple[Optional[str], str, float]:
+CAP_PATTERNS = [
+    r'(maxuttag|max uttag|maximalt uttag)[^.\n]{0,140}',
+    r'(max withdrawal|withdrawal cap|maximum withdrawal)[^.\n]{0,140}',
+    r'(tak för uttag|uttakstak|vinsttak)[^.\n]{0,140}',
+]
+MONEY_HINT_PATTERN = r'(\d[\d\s\.,]{0,12})\s*(sek|kr|eur|€|\$|usd|gbp|£)'
+
+def find_max_withdrawal_cap(text: str, anchor_pos: Optional[int], window: int = 3500, budget: Optional[ExtractionBudget] = None) -> Tuple[Optional[str], str, float]:
     t = text.lower().replace("curaçao", "curacao")
 
     segment = t[anchor_pos:anchor_pos + window] if anchor_pos is not None else None
+    deadline = budget.deadline() if budget else None
 
-    cap_patterns = [
-        r'(maxuttag|max uttag|maximalt uttag)[^.\n]{0,140}',
-        r'(max withdrawal|withdrawal cap|maximum withdrawal)[^.\n]{0,140}',
-        r'(tak för uttag|uttakstak|vinsttak)[^.\n]{0,140}',
-    ]
-    money_hint = re.compile(r'(\d[\d\s\.,]{0,12})\s*(sek|kr|eur|€|\$|usd|gbp|£)', re.IGNORECASE)
+    money_hint = re.compile(MONEY_HINT_PATTERN, re.IGNORECASE)
 
-    def scan(s: str) -> Optional[str]:
-        for p in cap_patterns:
-            m = re.search(p, s, flags=re.IGNORECASE)
+    def scan(s: str) -> Tuple[Optional[str], bool]:
+        for p in CAP_PATTERNS:
+            m, timed_out = _search_chunked(p, s, deadline)
+            if timed_out:
+                return None, True
             if m:
                 snippet = m.group(0).strip()
                 nearby = s[m.start():min(len(s), m.start()+200)]
                 if money_hint.search(nearby):
-                    return snippet + " (pengabelopp hittat)"
-                return snippet
-        return None
+                    return snippet + " (pengabelopp hittat)", False
+                return snippet, False
+        return None, False
 
     if segment:
-        found = scan(segment)
+        found, _ = scan(segment)
         if found:
             return found, "Maxuttag/cap hittades nära bonusvillkoren", 0.9
 
-    found_global = scan(t)
+    found_global, timed_out = scan(t)
     if found_global:
         return found_global, "Maxuttag/cap hittades globalt (osäkrare koppling)", 0.65
+    if timed_out:
+        # Frånvaro av cap kan inte bekräftas => lägre confidence
+        return None, "Maxuttag/cap-sökning avbröts av tidsbudget", BUDGET_EXCEEDED_CONF
 
     return None, "Inget maxuttag/cap hittades", 0.85
 
-def extract_license(text: str) -> Tuple[str, float, str]:
+# "licensed ... malta" var tidigare ".*" vilket är kvadratiskt på sidor med många "licensed" utan "malta"
+MGA_PATTERNS = [
+    r"malta gaming authority",
+    r"\bmga\b",
+    r"licensed.{0,200}malta",
+    r"regulated.{0,200}malta",
+]
+CURACAO_PATTERNS = [
+    r"\bcuracao\b",
+    r"curacao egaming",
+    r"antillephone",
+    r"gaming curacao",
+    r"master license",
+    r"\b8048/jaz\b",
+    r"\b365/jaz\b",
+]
+
+def extract_license(text: str, budget: Optional[ExtractionBudget] = None) -> Tuple[str, float, str]:
     t = text.lower().replace("curaçao", "curacao")
+    deadline = budget.deadline() if budget else None
+
+    def any_match(patterns) -> Tuple[bool, bool]:
+        # (hittad, avbruten av tidsbudget)
+        for p in patterns:
+            m, expired = _search_chunked(p, t, deadline)
+            if expired:
+                return False, True
+            if m:
+                return True, False
+        return False, False
+
+    is_mga, mga_skipped = any_match(MGA_PATTERNS)
+    is_cur, cur_skipped = any_match(CURACAO_PATTERNS)
 
-    mga_patterns = [
-        r"malta gaming authority",
-        r"\bmga\b",
-        r"licensed.*malta",
-        r"regulated.*malta",
-    ]
-    curacao_patterns = [
-        r"\bcuracao\b",
-        r"curacao egaming",
-        r"antillephone",
-        r"gaming curacao",
-        r"master license",
-        r"\b8048/jaz\b",
-        r"\b365/jaz\b",
-    ]
-
-    def any_match(patterns):
-        return any(re.search(p, t, flags=re.IGNORECASE) for p in patterns)
-
-    is_mga = any_match(mga_patterns)
-    is_cur = any_match(curacao_patterns)
+    if mga_skipped or cur_skipped:
+        # Frånvaro är bara bekräftad för den kontroll som hann klart
+        if is_mga:
+            return "MGA", BUDGET_EXCEEDED_CONF, "Licens hittad: MGA (tidsbudget överskreds, Curacao ej kontrollerad)"
+        if is_cur:
+            return "CURACAO", BUDGET_EXCEEDED_CONF, "Licens hittad: Curacao (tidsbudget överskreds, MGA ej kontrollerad)"
+        skipped = " + ".join([n for n, sk in (("MGA", mga_skipped), ("Curacao", cur_skipped)) if sk])
+        return "OKAND", BUDGET_EXCEEDED_NOT_FOUND_CONF, f"Licens hittades inte inom tidsbudget ({skipped} ej kontrollerad)"
 
     if is_mga and not is_cur:
         return "MGA", 0.9, "Licens hittad: MGA"
@@ -0,0 +1,195 @@
+import os
+import json
+import heapq
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from datetime import datetime, timezone, timedelta
+
+# Fält vars förändring räknas som "erbjudandet ändrades"
+TRACKED_FIELDS = ["BonusProcent", "OmsattningsKrav", "MaxUttagBonusvinster"]
+
+# Gränser för intervallet mellan två kontroller av samma casino
+MIN_INTERVAL_HOURS = 6.0
+MAX_INTERVAL_HOURS = 24.0 * 14
+
+# Kontrollera ungefär så här många gånger per förväntad ändring
+CHECKS_PER_CHANGE = 2.0
+
+# Opålitliga rader (under confidence-tröskeln) bevisar inte stabilitet: max dagligen
+UNRELIABLE_MAX_INTERVAL_HOURS = 24.0
+
+# Prior (Laplace-utjämning): 1 ändring per 2 dagar => nya casinon kontrolleras dagligen
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 2.0
+
+DEFAULT_STATE_PATH = "state/refresh_state.json"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# -----------------------
+# STATE IO
+# -----------------------
+
+def load_state(path: str = DEFAULT_STATE_PATH) -> Dict[str, Any]:
+    """
+    Läser per-casino statistik från tidigare körningar.
+    Saknas filen (första körningen) => tomt state.
+    """
+    if not os.path.exists(path):
+        return {"casinos": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    state.setdefault("casinos", {})
+    return state
+
+
+def save_state(state: Dict[str, Any], path: str = DEFAULT_STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# -----------------------
+# CHANGE STATISTICS
+# -----------------------
+
+def compute_interval_hours(entry: Dict[str, Any]) -> float:
+    """
+    Uppskattar ändringstakt (ändringar/dag) från historiken och returnerar
+    intervallet till nästa kontroll. Volatila casinon => kort intervall.
+    """
+    first = _parse_ts(entry.get("first_checked"))
+    last = _parse_ts(entry.get("last_checked"))
+    observed_days = (last - first).total_seconds() / 86400.0 if first and last else 0.0
+
+    changes_per_day = (entry.get("changed_runs", 0) + PRIOR_CHANGES) / (observed_days + PRIOR_DAYS)
+    hours = 24.0 / (changes_per_day * CHECKS_PER_CHANGE)
+    return max(MIN_INTERVAL_HOURS, min(MAX_INTERVAL_HOURS, hours))
+
+
+def _count_changes(entry: Dict[str, Any], prev: Dict[str, Any], values: Dict[str, Any]) -> None:
+    changed = [f for f in TRACKED_FIELDS if prev.get(f, "") != values[f]]
+    for f in changed:
+        entry["field_changes"][f] = entry["field_changes"].get(f, 0) + 1
+    if changed:
+        entry["changed_runs"] += 1
+
+
+def record_result(state: Dict[str, Any], domain_key: str, row: Dict[str, Any], fetched: bool, reliable: bool = True, timed_out: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Uppdaterar statistiken för ett casino efter en kontroll och sparar raden
+    så att den kan återanvändas när casinot inte är "due".
+    - Misslyckad hämtning: räknas inte, senaste raden behålls och casinot
+      försöks igen efter MIN_INTERVAL_HOURS.
+    - Pålitlig rad: jämförs mot senaste pålitliga värden och förlänger
+      observationsfönstret (last_checked).
+    - Opålitlig rad (låg confidence): förlänger inte fönstret och intervallet
+      kapas till UNRELIABLE_MAX_INTERVAL_HOURS. Första opålitliga raden efter en
+      pålitlig räknas som ändring om värdena skiljer (t.ex. bonusen borttagen),
+      utom när den beror på tidsbudget (timed_out).
+    Värdena sparas per källa (row["_source"]) och jämförs bara med samma källas
+    förra värden, så att det inte spelar roll vilken källa som råkade vinna.
+    """
+    now = now or _now()
+    entry = state["casinos"].setdefault(domain_key, {
+        "checks": 0,
+        "changed_runs": 0,
+        "field_changes": {f: 0 for f in TRACKED_FIELDS},
+        "first_checked": now.isoformat(),
+    })
+
+    cached = dict(row)
+    cached["SenastUppdaterad"] = now.isoformat()
+
+    if not fetched:
+        entry["interval_hours"] = MIN_INTERVAL_HOURS
+        entry["next_due"] = (now + timedelta(hours=MIN_INTERVAL_HOURS)).isoformat()
+        # Ett tillfälligt fetch-fel ska inte ersätta senaste goda raden i arket
+        entry.setdefault("last_row", cached)
+        return entry
+
+    entry["checks"] += 1
+    by_source = entry.setdefault("last_values_by_source", {})
+    source = row.get("_source") or ""
+    prev = by_source.get(source)
+    values = {f: row.get(f, "") for f in TRACKED_FIELDS}
+    comparable = prev is not None
+
+    if reliable:
+        if comparable:
+            _count_changes(entry, prev, values)
+        by_source[source] = values
+        entry["last_unreliable"] = False
+        entry["last_checked"] = now.isoformat()
+        interval = compute_interval_hours(entry)
+    else:
+        if comparable and not timed_out and not entry.get("last_unreliable"):
+            _count_changes(entry, prev, values)
+            entry["last_unreliable"] = True
+        interval = min(compute_interval_hours(entry), UNRELIABLE_MAX_INTERVAL_HOURS)
+
+    entry["interval_hours"] = round(interval, 2)
+    entry["next_due"] = (now + timedelta(hours=interval)).isoformat()
+    entry["last_row"] = cached
+    return entry
+
+
+# -----------------------
+# PRIORITY QUEUE
+# -----------------------
+
+def select_due(state: Dict[str, Any], casinos: List[Tuple[str, Dict[str, Any]]], fetch_budget: int, cost: Optional[Callable[[Dict[str, Any]], int]] = None, now: Optional[datetime] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Bygger en prioritetskö på next_due och returnerar de casinon som är due,
+    mest försenade först, så länge summan av cost(casino) (antal hämtningar,
+    default 1) ryms i fetch_budget.
+    Casinon utan historik (eller utan sparad rad) tas alltid med, oavsett budget,
+    så att arket aldrig saknar rader. De räknas ändå mot budgeten.
+    """
+    now = now or _now()
+    cost = cost or (lambda casino: 1)
+
+    out = []
+    spent = 0
+    heap = []
+    for i, (domain_key, casino) in enumerate(casinos):
+        entry = state["casinos"].get(domain_key) or {}
+        due = _parse_ts(entry.get("next_due")) if entry.get("last_row") else None
+        if due is None:
+            out.append((domain_key, casino))
+            spent += cost(casino)
+        else:
+            heapq.heappush(heap, (due, i, domain_key, casino))
+
+    while heap:
+        due, _, domain_key, casino = heapq.heappop(heap)
+        if due > now:
+            break
+        c = cost(casino)
+        # Stanna vid första som inte ryms (behåller försenings-ordningen),
+        # men ett ensamt casino med fler källor än budgeten svälts inte ut
+        if spent + c > fetch_budget and out:
+            break
+        out.append((domain_key, casino))
+        spent += c
+    return out
+
+
+def cached_row(state: Dict[str, Any], domain_key: str) -> Optional[Dict[str, Any]]:
+    entry = state["casinos"].get(domain_key)
+    if not entry or not entry.get("last_row"):
+        return None
+    return dict(entry["last_row"])
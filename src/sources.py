@@ -1,9 +1,13 @@
 import re
+import threading
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from typing import Tuple, Optional, Dict, Any, List
 
+# Max antal bytes som läses per svar innan HTML-parsning (stora/fientliga sidor)
+MAX_RESPONSE_BYTES = 2_000_000
+
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; CasinoSheetsBot/1.0; +https://github.com/)",
     "Accept-Language": "sv-SE,sv;q=0.9,en;q=0.8",
@@ -47,19 +51,50 @@ def _regex_block(text: str, start_regex: str, end_regex: str, max_chars: int = 1
         return block, "regex_block: hittade block men kort"
     return block[:max_chars], "OK: regex_block"
 
-def fetch_text_with_adapter(url: str, extract_cfg: Optional[Dict[str, Any]] = None, timeout: int = 25) -> Tuple[Optional[str], str, str]:
+def _get_capped(url: str, timeout: int, max_bytes: int, cancel: Optional[threading.Event] = None) -> Tuple[str, str]:
+    """
+    Hämtar url strömmande och läser högst max_bytes.
+    Returnerar (html, note) där note är tom om inget kapades.
+    Kastar vid fetch-fel eller om cancel sätts under nedladdningen.
+    """
+    with requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in r.iter_content(chunk_size=65536):
+            if cancel is not None and cancel.is_set():
+                raise RuntimeError("avbruten, annan källa vann")
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+        body = b"".join(chunks)[:max_bytes]
+        html = body.decode(r.encoding or "utf-8", errors="replace")
+    note = f"VARNING: svar kapat vid {max_bytes} bytes" if truncated else ""
+    return html, note
+
+def fetch_text_with_adapter(url: str, extract_cfg: Optional[Dict[str, Any]] = None, timeout: int = 25, max_bytes: int = MAX_RESPONSE_BYTES, cancel: Optional[threading.Event] = None) -> Tuple[Optional[str], str, str]:
     """
     Returnerar (text, note, final_url_used)
+    cancel: sätts när resultatet inte längre behövs; nedladdning och parsning avbryts då.
     """
     try:
-        r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
-        r.raise_for_status()
+        html, size_note = _get_capped(url, timeout, max_bytes, cancel=cancel)
     except Exception as e:
         return None, f"Fetch-fel: {e}", url
 
-    soup = BeautifulSoup(r.text, "lxml")
+    if cancel is not None and cancel.is_set():
+        return None, "Fetch-fel: avbruten, annan källa vann", url
+
+    soup = BeautifulSoup(html, "lxml")
     _clean_soup(soup)
 
+    text, note, final_url = _text_from_soup(soup, url, extract_cfg, timeout, max_bytes, cancel)
+    return text, " | ".join([n for n in [size_note, note] if n]), final_url
+
+def _text_from_soup(soup: BeautifulSoup, url: str, extract_cfg: Optional[Dict[str, Any]], timeout: int, max_bytes: int, cancel: Optional[threading.Event] = None) -> Tuple[Optional[str], str, str]:
     mode = (extract_cfg or {}).get("mode", "fullpage")
 
     if mode == "selectors":
@@ -75,16 +110,16 @@ def fetch_text_with_adapter(url: str, extract_cfg: Optional[Dict[str, Any]] = No
         link = _find_link_by_text(soup, url, contains_terms)
         if link:
             try:
-                r22 = requests.get(link, headers=DEFAULT_HEADERS, timeout=timeout)
-                r2.raise_for_status()
-                soup2 = BeautifulSoup(r2.text, "lxml")
+                html2, size_note2 = _get_capped(link, timeout, max_bytes, cancel=cancel)
+                soup2 = BeautifulSoup(html2, "lxml")
                 _clean_soup(soup2)
                 selectors = extract_cfg.get("selectors", ["main", "article", "body"])
                 text, note = _get_text_from_selectors(soup2, selectors)
+                prefix = f"{size_note2} | " if size_note2 else ""
                 if text:
-                    return text, f"OK: följde länk -> {note}", link
+                    return text, f"{prefix}OK: följde länk -> {note}", link
                 full2 = " ".join(soup2.get_text(" ", strip=True).split())
-                return full2, f"Följde länk men {note} | fallback fullpage", link
+                return full2, f"{prefix}Följde länk men {note} | fallback fullpage", link
             except Exception as e:
                 full = " ".join(soup.get_text(" ", strip=True).split())
                 return full, f"Följde länk men fetch-fel: {e} | fallback ursprungssida", url